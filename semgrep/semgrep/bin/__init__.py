@@ -1 +1 @@
-# Binaries will be installed in this module directory and referenced via 'pkg_resources'
+# Binaries will be installed in this module directory and located relative to 'semgrep.util'
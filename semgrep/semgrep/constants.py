@@ -61,7 +61,7 @@ NOSEM_INLINE_RE = re.compile(
     r" nosem(?:grep)?(?:[:=][\s]?(?P<ids>([^,\s](?:[,\s]+)?)+))?",
     re.IGNORECASE,
 )
-COMMA_SEPARATED_LIST_RE = re.compile(r"[,\s]")
+NOSEM_ID_RE = re.compile(r"[\w\-.]*")
 
 MAX_LINES_FLAG_NAME = "--max-lines-per-finding"
 DEFAULT_MAX_LINES_PER_FINDING = 10
@@ -1,6 +1,8 @@
 import contextlib
+import itertools
 import json
 import logging
+import operator
 import sys
 from collections import defaultdict
 from pathlib import Path
@@ -31,18 +33,51 @@ from semgrep.error import FINDINGS_EXIT_CODE
 from semgrep.error import Level
 from semgrep.error import MatchTimeoutError
 from semgrep.error import SemgrepError
-from semgrep.external.junit_xml import TestSuite  # type: ignore[attr-defined]
-from semgrep.external.junit_xml import to_xml_report_string  # type: ignore[attr-defined]
 from semgrep.profile_manager import ProfileManager
 from semgrep.rule import Rule
 from semgrep.rule_match import RuleMatch
-from semgrep.stats import make_loc_stats
-from semgrep.stats import make_target_stats
 from semgrep.util import is_url
 from semgrep.util import with_color
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
 logger = logging.getLogger(__name__)
 
+BRIGHT = colorama.Style.BRIGHT
+RESET_ALL = colorama.Style.RESET_ALL
+GREEN = colorama.Fore.GREEN
+
+
+def _json_dumps(obj: Any) -> str:
+    """
+    Serialize obj to a JSON string, using orjson when it is installed since
+    it is considerably faster than the stdlib on large outputs.
+
+    Output with non-ASCII characters, and anything orjson can't serialize,
+    goes through json.dumps instead, which escapes it so the output can be
+    written to a stream of any encoding. It uses the same compact separators
+    as orjson, so one run never mixes formats.
+    """
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(
+                obj,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+                | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return json.dumps(obj, separators=(",", ":"))
+        output: str = encoded.decode("utf-8")
+        # decoding shortens the output iff it contains multibyte characters
+        if len(output) != len(encoded) or "\x7f" in output:
+            return json.dumps(obj, separators=(",", ":"))
+        return output
+    return json.dumps(obj)
+
 
 def color_line(
     line: str,
@@ -52,19 +87,32 @@ def color_line(
     end_line: int,
     end_col: int,
 ) -> str:
+    line_length = len(line)
     start_color = 0 if line_number > start_line else start_col
     # column offset
     start_color = max(start_color - 1, 0)
-    end_color = end_col if line_number >= end_line else len(line) + 1 + 1
+    end_color = end_col if line_number >= end_line else line_length + 1 + 1
     end_color = max(end_color - 1, 0)
-    line = (
-        line[:start_color]
-        + colorama.Style.BRIGHT
-        + line[start_color : end_color + 1]  # want the color to include the end_col
-        + colorama.Style.RESET_ALL
-        + line[end_color + 1 :]
-    )
-    return line
+    if start_color == 0 and end_color + 1 >= line_length:
+        # the whole line is highlighted, e.g. the middle of a multiline match
+        return f"{BRIGHT}{line}{RESET_ALL}"
+    # want the color to include the end_col
+    return f"{line[:start_color]}{BRIGHT}{line[start_color : end_color + 1]}{RESET_ALL}{line[end_color + 1 :]}"
+
+
+def _colored_lines(
+    lines: List[str], start_line: int, start_col: int, end_line: int, end_col: int
+) -> Iterator[str]:
+    for line_number, line in enumerate(lines, start_line):
+        line = color_line(
+            line.rstrip(), line_number, start_line, start_col, end_line, end_col
+        )
+        yield f"{GREEN}{line_number}{RESET_ALL}:{line}"
+
+
+def _numbered_lines(lines: List[str], start_line: int) -> Iterator[str]:
+    for line_number, line in enumerate(lines, start_line):
+        yield f"{line_number}:{line.rstrip()}"
 
 
 def finding_to_line(
@@ -85,43 +133,54 @@ def finding_to_line(
             trimmed = len(lines) - per_finding_max_lines_limit
             lines = lines[:per_finding_max_lines_limit]
 
-        for i, line in enumerate(lines):
-            line = line.rstrip()
-            line_number = ""
-            if start_line:
-                if color_output:
-                    line = color_line(
-                        line, start_line + i, start_line, start_col, end_line, end_col  # type: ignore
-                    )
-                    line_number = f"{colorama.Fore.GREEN}{start_line + i}{colorama.Style.RESET_ALL}"
-                else:
-                    line_number = f"{start_line + i}"
-
-            yield f"{line_number}:{line}" if line_number else f"{line}"
-        trimmed_str = (
-            f" [hid {trimmed} additional lines, adjust with {MAX_LINES_FLAG_NAME}] "
-        )
+        # pick how to render lines once, rather than for every line
+        if not start_line:
+            yield from (line.rstrip() for line in lines)
+        elif color_output:
+            yield from _colored_lines(lines, start_line, start_col, end_line, end_col)  # type: ignore
+        else:
+            yield from _numbered_lines(lines, start_line)
+
         if per_finding_max_lines_limit != 1:
             if trimmed > 0:
+                trimmed_str = f" [hid {trimmed} additional lines, adjust with {MAX_LINES_FLAG_NAME}] "
                 yield trimmed_str.center(BREAK_LINE_WIDTH, BREAK_LINE_CHAR)
             elif show_separator:
                 yield BREAK_LINE
 
 
+def sort_rule_matches(rule_matches: List[RuleMatch]) -> List[RuleMatch]:
+    """
+    Sort matches by path, then rule id, which is the order the text based
+    output formats list them in.
+    """
+    return sorted(rule_matches, key=operator.attrgetter("path", "id"))
+
+
 def build_normal_output(
-    rule_matches: List[RuleMatch],
+    sorted_rule_matches: List[RuleMatch],
     color_output: bool,
     per_finding_max_lines_limit: Optional[int],
 ) -> Iterator[str]:
+    """
+    Expects sorted_rule_matches to be ordered as per sort_rule_matches.
+    """
     RESET_COLOR = colorama.Style.RESET_ALL if color_output else ""
     GREEN_COLOR = colorama.Fore.GREEN if color_output else ""
     YELLOW_COLOR = colorama.Fore.YELLOW if color_output else ""
     RED_COLOR = colorama.Fore.RED if color_output else ""
     BLUE_COLOR = colorama.Fore.BLUE if color_output else ""
+    severity_prepends = {
+        "": "",
+        "error": f"{RED_COLOR}severity:error ",
+        "warning": f"{YELLOW_COLOR}severity:warning ",
+    }
+    file_header = f"{GREEN_COLOR}{{}}{RESET_COLOR}".format
+    rule_line = f"{{}}{YELLOW_COLOR}rule:{{}}: {{}}{RESET_COLOR}".format
+    autofix_prefix = f"{BLUE_COLOR}autofix:{RESET_COLOR}"
 
     last_file = None
     last_message = None
-    sorted_rule_matches = sorted(rule_matches, key=lambda r: (r.path, r.id))
     for rule_index, rule_match in enumerate(sorted_rule_matches):
 
         current_file = rule_match.path
@@ -132,7 +191,7 @@ def build_normal_output(
         if last_file is None or last_file != current_file:
             if last_file is not None:
                 yield ""
-            yield f"{GREEN_COLOR}{current_file}{RESET_COLOR}"
+            yield file_header(current_file)
             last_message = None
         # don't display the rule line if the check is empty
         if (
@@ -140,15 +199,10 @@ def build_normal_output(
             and check_id != CLI_RULE_ID
             and (last_message is None or last_message != message)
         ):
-            severity_prepend = ""
-            if severity:
-                if severity == "error":
-                    severity_prepend = f"{RED_COLOR}severity:{severity} "
-                elif severity == "warning":
-                    severity_prepend = f"{YELLOW_COLOR}severity:{severity} "
-                else:
-                    severity_prepend = f"severity:{severity} "
-            yield f"{severity_prepend}{YELLOW_COLOR}rule:{check_id}: {message}{RESET_COLOR}"
+            severity_prepend = severity_prepends.get(severity)
+            if severity_prepend is None:
+                severity_prepend = f"severity:{severity} "
+            yield rule_line(severity_prepend, check_id, message)
 
         last_file = current_file
         last_message = message
@@ -168,23 +222,19 @@ def build_normal_output(
         )
 
         if fix:
-            yield f"{BLUE_COLOR}autofix:{RESET_COLOR} {fix}"
+            yield f"{autofix_prefix} {fix}"
         elif rule_match.fix_regex:
             fix_regex = rule_match.fix_regex
-            yield f"{BLUE_COLOR}autofix:{RESET_COLOR} s/{fix_regex.get('regex')}/{fix_regex.get('replacement')}/{fix_regex.get('count', 'g')}"
+            yield f"{autofix_prefix} s/{fix_regex.get('regex')}/{fix_regex.get('replacement')}/{fix_regex.get('count', 'g')}"
 
 
 def _build_time_target_json(
-    rules: List[Rule],
     target: Path,
-    match_time_matrix: Dict[Tuple[str, str], float],
+    match_times: List[float],
 ) -> Dict[str, Any]:
     target_json: Dict[str, Any] = {}
-    path_str = str(target)
-    target_json["path"] = path_str
-    target_json["match_times"] = [
-        match_time_matrix.get((rule.id, path_str), 0.0) for rule in rules
-    ]
+    target_json["path"] = str(target)
+    target_json["match_times"] = match_times
     return target_json
 
 
@@ -205,12 +255,35 @@ def _build_time_json(
     # this list of all rules names is given here so they don't have to be
     # repeated for each target in the 'targets' field, saving space.
     time["rules"] = [{"id": rule.id} for rule in rules]
+
+    # The matrix is sparse, so rather than looking up every (rule, target)
+    # pair, scatter its entries into a row of times per target.
+    rule_columns: Dict[str, List[int]] = defaultdict(list)
+    for column, rule in enumerate(rules):
+        rule_columns[rule.id].append(column)
+    match_times_by_path: Dict[str, List[float]] = {}
+    for (rule_id, path_str), duration in match_time_matrix.items():
+        columns = rule_columns.get(rule_id)
+        if not columns:
+            continue
+        match_times = match_times_by_path.get(path_str)
+        if match_times is None:
+            match_times = match_times_by_path[path_str] = [0.0] * len(rules)
+        for column in columns:
+            match_times[column] = duration
+
     time["targets"] = [
-        _build_time_target_json(rules, target, match_time_matrix) for target in targets
+        _build_time_target_json(
+            target, match_times_by_path.get(str(target)) or [0.0] * len(rules)
+        )
+        for target in targets
     ]
     return time
 
 
+EMPTY_OUTPUT_JSON = _json_dumps({"results": [], "errors": []})
+
+
 def build_output_json(
     rule_matches: List[RuleMatch],
     semgrep_structured_errors: List[SemgrepError],
@@ -222,14 +295,28 @@ def build_output_json(
     profiler: Optional[ProfileManager] = None,
     debug_steps_by_rule: Optional[Dict[Rule, List[Dict[str, Any]]]] = None,
 ) -> str:
+    if not (
+        rule_matches
+        or semgrep_structured_errors
+        or show_json_stats
+        or report_time
+        or debug_steps_by_rule
+    ):
+        return EMPTY_OUTPUT_JSON
     output_json: Dict[str, Any] = {}
-    output_json["results"] = [rm.to_json() for rm in rule_matches]
+    output_json["results"] = list(map(operator.methodcaller("to_json"), rule_matches))
     if debug_steps_by_rule:
         output_json["debug"] = [
             {r.id: steps for r, steps in debug_steps_by_rule.items()}
         ]
-    output_json["errors"] = [e.to_dict() for e in semgrep_structured_errors]
+    output_json["errors"] = list(
+        map(operator.methodcaller("to_dict"), semgrep_structured_errors)
+    )
     if show_json_stats:
+        # here for faster startup times
+        from semgrep.stats import make_loc_stats
+        from semgrep.stats import make_target_stats
+
         output_json["stats"] = {
             "targets": make_target_stats(all_targets),
             "loc": make_loc_stats(all_targets),
@@ -239,7 +326,7 @@ def build_output_json(
         output_json["time"] = _build_time_json(
             filtered_rules, all_targets, match_time_matrix
         )
-    return json.dumps(output_json)
+    return _json_dumps(output_json)
 
 
 def build_junit_xml_output(
@@ -248,7 +335,11 @@ def build_junit_xml_output(
     """
     Format matches in JUnit XML format.
     """
-    test_cases = [match.to_junit_xml() for match in rule_matches]
+    # here for faster startup times
+    from semgrep.external.junit_xml import TestSuite  # type: ignore[attr-defined]
+    from semgrep.external.junit_xml import to_xml_report_string  # type: ignore[attr-defined]
+
+    test_cases = list(map(operator.methodcaller("to_junit_xml"), rule_matches))
     ts = TestSuite("semgrep results", test_cases)
     return cast(str, to_xml_report_string([ts]))
 
@@ -280,9 +371,19 @@ def _sarif_notification_from_error(error: SemgrepError) -> Dict[str, Any]:
     }
 
 
+def build_sarif_rules(rules: FrozenSet[Rule]) -> List[Dict[str, Any]]:
+    # sort so the output doesn't depend on the set's iteration order
+    return list(
+        map(
+            operator.methodcaller("to_sarif"),
+            sorted(rules, key=operator.attrgetter("id")),
+        )
+    )
+
+
 def build_sarif_output(
     rule_matches: List[RuleMatch],
-    rules: FrozenSet[Rule],
+    sarif_rules: List[Dict[str, Any]],
     semgrep_structured_errors: List[SemgrepError],
 ) -> str:
     """
@@ -301,10 +402,10 @@ def build_sarif_output(
                 "tool": {
                     "driver": {
                         **_sarif_tool_info(),
-                        "rules": [rule.to_sarif() for rule in rules],
+                        "rules": sarif_rules,
                     }
                 },
-                "results": [match.to_sarif() for match in rule_matches],
+                "results": list(map(operator.methodcaller("to_sarif"), rule_matches)),
                 "invocations": [
                     {
                         "toolExecutionNotifications": [
@@ -316,52 +417,54 @@ def build_sarif_output(
             },
         ],
     }
-    return json.dumps(output_dict)
+    return _json_dumps(output_dict)
 
 
 def iter_emacs_output(
-    rule_matches: List[RuleMatch], rules: FrozenSet[Rule]
+    sorted_rule_matches: List[RuleMatch], rules: FrozenSet[Rule]
 ) -> Iterator[str]:
-    last_file = None
-    last_message = None
-    sorted_rule_matches = sorted(rule_matches, key=lambda r: (r.path, r.id))
-    for _, rule_match in enumerate(sorted_rule_matches):
-        current_file = rule_match.path
-        check_id = rule_match.id
-        message = rule_match.message
-        severity = rule_match.severity.lower()
-        start_line = rule_match.start.get("line")
-        start_col = rule_match.start.get("col")
-        line = rule_match.lines[0].rstrip()
+    """
+    Expects sorted_rule_matches to be ordered as per sort_rule_matches.
+    """
+    get_fields = operator.attrgetter("path", "id", "severity", "start", "lines")
+    for rule_match in sorted_rule_matches:
+        current_file, check_id, severity, start, lines = get_fields(rule_match)
+        line = lines[0].rstrip()
         info = ""
         if check_id and check_id != CLI_RULE_ID:
-            check_id = check_id.split(".")[-1]
+            check_id = check_id.rpartition(".")[2]
             info = f"({check_id})"
-        yield f"{current_file}:{start_line}:{start_col}:{severity}{info}:{line}"
+        yield f"{current_file}:{start['line']}:{start['col']}:{severity.lower()}{info}:{line}"
 
 
-def build_emacs_output(rule_matches: List[RuleMatch], rules: FrozenSet[Rule]) -> str:
-    return "\n".join(list(iter_emacs_output(rule_matches, rules)))
+def build_emacs_output(
+    sorted_rule_matches: List[RuleMatch], rules: FrozenSet[Rule]
+) -> str:
+    return "\n".join(iter_emacs_output(sorted_rule_matches, rules))
 
 
-def build_vim_output(rule_matches: List[RuleMatch], rules: FrozenSet[Rule]) -> str:
-    severity = {
-        "INFO": "I",
-        "WARNING": "W",
-        "ERROR": "E",
-    }
+VIM_SEVERITY: Dict[str, str] = {
+    "INFO": "I",
+    "WARNING": "W",
+    "ERROR": "E",
+}
 
-    def _get_parts(rule_match: RuleMatch) -> List[str]:
-        return [
-            str(rule_match.path),
-            str(rule_match.start["line"]),
-            str(rule_match.start["col"]),
-            severity[rule_match.severity],
-            rule_match.id,
-            rule_match.message,
-        ]
 
-    return "\n".join(":".join(_get_parts(rm)) for rm in rule_matches)
+def build_vim_output(rule_matches: List[RuleMatch], rules: FrozenSet[Rule]) -> str:
+    severity = VIM_SEVERITY.__getitem__
+    vim_line = "{}:{}:{}:{}:{}:{}".format
+
+    return "\n".join(
+        vim_line(
+            rm.path,
+            rm.start["line"],
+            rm.start["col"],
+            severity(rm.severity),
+            rm.id,
+            rm.message,
+        )
+        for rm in rule_matches
+    )
 
 
 class OutputSettings(NamedTuple):
@@ -415,11 +518,13 @@ class OutputHandler:
         self.stdout = stdout
 
         self.rule_matches: List[RuleMatch] = []
+        self._sorted_rule_matches: Optional[List[RuleMatch]] = None
+        self._sarif_rules: Optional[List[Dict[str, Any]]] = None
         self.debug_steps_by_rule: Dict[Rule, List[Dict[str, Any]]] = {}
         self.stats_line: Optional[str] = None
         self.all_targets: Set[Path] = set()
         self.profiler: Optional[ProfileManager] = None
-        self.rules: FrozenSet[Rule] = frozenset()
+        self._rules: Set[Rule] = set()
         self.semgrep_structured_errors: List[SemgrepError] = []
         self.error_set: Set[SemgrepError] = set()
         self.has_output = False
@@ -430,27 +535,46 @@ class OutputHandler:
 
         self.final_error: Optional[Exception] = None
 
+    @property
+    def rules(self) -> FrozenSet[Rule]:
+        return frozenset(self._rules)
+
+    @property
+    def sorted_rule_matches(self) -> List[RuleMatch]:
+        if self._sorted_rule_matches is None:
+            self._sorted_rule_matches = sort_rule_matches(self.rule_matches)
+        return self._sorted_rule_matches
+
+    @property
+    def sarif_rules(self) -> List[Dict[str, Any]]:
+        if self._sarif_rules is None:
+            self._sarif_rules = build_sarif_rules(self.rules)
+        return self._sarif_rules
+
     def handle_semgrep_errors(self, errors: List[SemgrepError]) -> None:
-        timeout_errors = defaultdict(list)
+        timeout_errors: List[MatchTimeoutError] = []
         for err in errors:
             if isinstance(err, MatchTimeoutError) and err not in self.error_set:
                 self.semgrep_structured_errors.append(err)
                 self.error_set.add(err)
-                timeout_errors[err.path].append(err.rule_id)
+                timeout_errors.append(err)
             else:
                 self.handle_semgrep_error(err)
 
         if timeout_errors and self.settings.output_format == OutputFormat.TEXT:
             self.handle_semgrep_timeout_errors(timeout_errors)
 
-    def handle_semgrep_timeout_errors(self, errors: Dict[Path, List[str]]) -> None:
+    def handle_semgrep_timeout_errors(self, errors: List[MatchTimeoutError]) -> None:
         self.has_output = True
         separator = ", "
         print_threshold_hint = False
-        for path in errors.keys():
-            num_errs = len(errors[path])
-            errors[path].sort()
-            error_msg = f"Warning: {num_errs} timeout error(s) in {path} when running the following rules: [{separator.join(errors[path])}]"
+        sorted_errors = sorted(errors, key=lambda err: (str(err.path), err.rule_id))
+        for path, errors_of_path in itertools.groupby(
+            sorted_errors, key=operator.attrgetter("path")
+        ):
+            rule_ids = [err.rule_id for err in errors_of_path]
+            num_errs = len(rule_ids)
+            error_msg = f"Warning: {num_errs} timeout error(s) in {path} when running the following rules: [{separator.join(rule_ids)}]"
             if num_errs == self.settings.timeout_threshold:
                 error_msg += f"\nSemgrep stopped running rules on {path} after {num_errs} timeout error(s). See `--timeout-threshold` for more info."
             print_threshold_hint = print_threshold_hint or (
@@ -490,12 +614,12 @@ class OutputHandler:
         match_time_matrix: Dict[Tuple[str, str], float],  # (rule, target) -> duration
     ) -> None:
         self.has_output = True
-        self.rules = self.rules.union(rule_matches_by_rule.keys())
-        self.rule_matches += [
-            match
-            for matches_of_one_rule in rule_matches_by_rule.values()
-            for match in matches_of_one_rule
-        ]
+        self._rules.update(rule_matches_by_rule.keys())
+        self._sarif_rules = None
+        self.rule_matches.extend(
+            itertools.chain.from_iterable(rule_matches_by_rule.values())
+        )
+        self._sorted_rule_matches = None
         self.profiler = profiler
         self.all_targets = all_targets
         self.stats_line = stats_line
@@ -582,7 +706,7 @@ class OutputHandler:
                 save_path = base_path.joinpath(destination)
             # create the folders if not exists
             save_path.parent.mkdir(parents=True, exist_ok=True)
-            with save_path.open(mode="w") as fout:
+            with save_path.open(mode="w", encoding="utf-8") as fout:
                 fout.write(output)
 
     @classmethod
@@ -619,18 +743,18 @@ class OutputHandler:
             return build_junit_xml_output(self.rule_matches, self.rules)
         elif output_format == OutputFormat.SARIF:
             return build_sarif_output(
-                self.rule_matches, self.rules, self.semgrep_structured_errors
+                self.rule_matches, self.sarif_rules, self.semgrep_structured_errors
             )
         elif output_format == OutputFormat.EMACS:
-            return build_emacs_output(self.rule_matches, self.rules)
+            return build_emacs_output(self.sorted_rule_matches, self.rules)
         elif output_format == OutputFormat.VIM:
             return build_vim_output(self.rule_matches, self.rules)
         elif output_format == OutputFormat.TEXT:
             return "\n".join(
-                list(
-                    build_normal_output(
-                        self.rule_matches, color_output, per_finding_max_lines_limit
-                    )
+                build_normal_output(
+                    self.sorted_rule_matches,
+                    color_output,
+                    per_finding_max_lines_limit,
                 )
             )
         else:
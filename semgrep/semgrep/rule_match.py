@@ -8,7 +8,6 @@ from typing import Optional
 
 import attr
 
-from semgrep.external.junit_xml import TestCase  # type: ignore[attr-defined]
 from semgrep.pattern_match import PatternMatch
 
 
@@ -33,7 +32,7 @@ class RuleMatch:
     _extra: Dict[str, Any] = attr.ib(repr=False)
 
     # optional attributes
-    _is_ignored: Optional[bool] = attr.ib(default=None)
+    _is_ignored: bool = attr.ib(default=False)
 
     @classmethod
     def from_pattern_match(
@@ -131,8 +130,7 @@ class RuleMatch:
             json_obj["extra"]["fix"] = self._fix
         if self._fix_regex:
             json_obj["extra"]["fix_regex"] = self._fix_regex
-        if self._is_ignored is not None:
-            json_obj["extra"]["is_ignored"] = self._is_ignored
+        json_obj["extra"]["is_ignored"] = self._is_ignored
         json_obj["start"] = self._start
         json_obj["end"] = self._end
         # self.lines already contains \n at the end of each line
@@ -141,6 +139,9 @@ class RuleMatch:
         return json_obj
 
     def to_junit_xml(self) -> Dict[str, Any]:
+        # here for faster startup times
+        from semgrep.external.junit_xml import TestCase  # type: ignore[attr-defined]
+
         test_case = TestCase(
             self.id,
             file=str(self.path),
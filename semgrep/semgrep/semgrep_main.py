@@ -2,8 +2,8 @@ import json
 import logging
 from io import StringIO
 from pathlib import Path
-from re import sub
 from typing import Any
+from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Tuple
@@ -11,13 +11,11 @@ from typing import Tuple
 import attr
 
 import semgrep.config_resolver
-from semgrep.autofix import apply_fixes
-from semgrep.constants import COMMA_SEPARATED_LIST_RE
 from semgrep.constants import DEFAULT_CONFIG_FILE
 from semgrep.constants import DEFAULT_TIMEOUT
+from semgrep.constants import NOSEM_ID_RE
 from semgrep.constants import NOSEM_INLINE_RE
 from semgrep.constants import OutputFormat
-from semgrep.core_runner import CoreRunner
 from semgrep.error import MISSING_CONFIG_EXIT_CODE
 from semgrep.error import SemgrepError
 from semgrep.output import OutputHandler
@@ -66,57 +64,73 @@ def notify_user_of_work(
     - which dirs are excluded, etc.
     """
     if include:
-        logger.info(f"including files:")
+        logger.info("including files:")
         for inc in include:
-            logger.info(f"- {inc}")
+            logger.info("- %s", inc)
     if exclude:
-        logger.info(f"excluding files:")
+        logger.info("excluding files:")
         for exc in exclude:
-            logger.info(f"- {exc}")
-    logger.info(f"running {len(filtered_rules)} rules...")
+            logger.info("- %s", exc)
+    logger.info("running %d rules...", len(filtered_rules))
     if verbose:
         logger.info("rules:")
         for rule in filtered_rules:
-            logger.info(f"- {rule.id}")
+            logger.info("- %s", rule.id)
 
 
 def rule_match_nosem(rule_match: RuleMatch, strict: bool) -> bool:
-    if not rule_match.lines:
+    lines = rule_match.lines
+    if not lines:
         return False
 
     # Only consider the first line of a match. This will keep consistent
     # behavior on where we expect a 'nosem' comment to exist. If we allow these
     # comments on any line of a match it will get confusing as to what finding
     # the 'nosem' is referring to.
-    re_match = NOSEM_INLINE_RE.search(rule_match.lines[0])
+    first_line = lines[0]
+    # Most lines have no 'nosem' at all, which is much cheaper to rule out
+    # than to run the regex. casefold() matches the regex's IGNORECASE.
+    if "nosem" not in first_line.casefold():
+        return False
+    re_match = NOSEM_INLINE_RE.search(first_line)
     if re_match is None:
         return False
 
     ids_str = re_match.groupdict()["ids"]
     if ids_str is None:
         logger.debug(
-            f"found 'nosem' comment, skipping rule '{rule_match.id}' on line {rule_match.start['line']}"
+            "found 'nosem' comment, skipping rule '%s' on line %s",
+            rule_match.id,
+            rule_match.start["line"],
         )
         return True
 
+    # Ids are separated by commas and/or whitespace.
     # Strip quotes to allow for use of nosem as an HTML attribute inside tags.
     # HTML comments inside tags are not allowed by the spec.
     pattern_ids = {
-        pattern_id.strip().strip("\"'")
-        for pattern_id in COMMA_SEPARATED_LIST_RE.split(ids_str)
-        if pattern_id.strip()
+        pattern_id.strip("\"'") for pattern_id in ids_str.replace(",", " ").split()
     }
 
     # Filter out ids that are not alphanum+dashes+underscores+periods.
     # This removes trailing symbols from comments, such as HTML comments `-->`
     # or C-like multiline comments `*/`.
-    pattern_ids = set(filter(lambda x: not sub(r"[\w\-\.]+", "", x), pattern_ids))
+    pattern_ids = {
+        pattern_id for pattern_id in pattern_ids if NOSEM_ID_RE.fullmatch(pattern_id)
+    }
+
+    if not strict and not logger.isEnabledFor(logging.DEBUG):
+        # Nothing to raise or log about the other ids, so skip checking them
+        return rule_match.id in pattern_ids
 
     result = False
     for pattern_id in pattern_ids:
         if rule_match.id == pattern_id:
             logger.debug(
-                f"found 'nosem' comment with id '{pattern_id}', skipping rule '{rule_match.id}' on line {rule_match.start['line']}"
+                "found 'nosem' comment with id '%s', skipping rule '%s' on line %s",
+                pattern_id,
+                rule_match.id,
+                rule_match.start["line"],
             )
             result = result or True
         else:
@@ -185,6 +199,10 @@ def main(
     report_time: bool = False,
     experimental: bool = False,
 ) -> None:
+    # here for faster startup times
+    from semgrep.autofix import apply_fixes
+    from semgrep.core_runner import CoreRunner
+
     if include is None:
         include = []
 
@@ -216,7 +234,12 @@ def main(
             f"({len(errors)} config files were invalid)" if len(errors) else ""
         )
         logger.debug(
-            f"running {len(filtered_rules)} rules from {len(configs_obj.valid)} config{plural} {config_id_if_single} {invalid_msg}"
+            "running %d rules from %d config%s %s %s",
+            len(filtered_rules),
+            len(configs_obj.valid),
+            plural,
+            config_id_if_single,
+            invalid_msg,
         )
 
         if len(configs_obj.valid) == 0:
@@ -269,23 +292,22 @@ The two most popular are:
 
     output_handler.handle_semgrep_errors(semgrep_errors)
 
-    rule_matches_by_rule = {
-        rule: [
-            attr.evolve(rule_match, is_ignored=rule_match_nosem(rule_match, strict))
-            for rule_match in rule_matches
-        ]
-        for rule, rule_matches in rule_matches_by_rule.items()
-    }
-
-    if not disable_nosem:
-        rule_matches_by_rule = {
-            rule: [
-                rule_match for rule_match in rule_matches if not rule_match._is_ignored
-            ]
-            for rule, rule_matches in rule_matches_by_rule.items()
-        }
-
-    num_findings = sum(len(v) for v in rule_matches_by_rule.values())
+    # Mark matches with a 'nosem' comment as ignored, or drop them outright
+    # unless nosem is disabled
+    nosem_rule_matches_by_rule: Dict[Rule, List[RuleMatch]] = {}
+    for rule, rule_matches in rule_matches_by_rule.items():
+        nosem_rule_matches = []
+        for rule_match in rule_matches:
+            is_ignored = rule_match_nosem(rule_match, strict)
+            if is_ignored:
+                if not disable_nosem:
+                    continue
+                rule_match = attr.evolve(rule_match, is_ignored=True)
+            nosem_rule_matches.append(rule_match)
+        nosem_rule_matches_by_rule[rule] = nosem_rule_matches
+    rule_matches_by_rule = nosem_rule_matches_by_rule
+
+    num_findings = sum(map(len, rule_matches_by_rule.values()))
     stats_line = f"ran {len(filtered_rules)} rules on {len(all_targets)} files: {num_findings} findings"
 
     output_handler.handle_semgrep_core_output(
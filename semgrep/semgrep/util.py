@@ -1,3 +1,4 @@
+import functools
 import itertools
 import logging
 import os
@@ -10,20 +11,20 @@ from typing import Callable
 from typing import IO
 from typing import Iterable
 from typing import List
+from typing import Optional
 from typing import Set
 from typing import Tuple
 from typing import TypeVar
 from urllib.parse import urlparse
 
-import pkg_resources
 from colorama import Fore
 from tqdm import tqdm
 
 T = TypeVar("T")
 
 YML_EXTENSIONS = {".yml", ".yaml"}
-YML_SUFFIXES = [[ext] for ext in YML_EXTENSIONS]
-YML_TEST_SUFFIXES = [[".test", ext] for ext in YML_EXTENSIONS]
+YML_SUFFIXES = tuple(YML_EXTENSIONS)
+YML_TEST_SUFFIXES = tuple(f".test{ext}" for ext in YML_EXTENSIONS)
 
 global DEBUG
 global QUIET
@@ -31,9 +32,16 @@ global FORCE_COLOR
 DEBUG = False
 QUIET = False
 FORCE_COLOR = False
+# Whether with_color emits ANSI escapes; worked out on its first call
+# and again after set_flags
+_COLOR_ENABLED: Optional[bool] = None
 
 
 def is_url(url: str) -> bool:
+    # Both a scheme and a netloc require a "://", and most strings we get
+    # here are local paths without one, so skip parsing those
+    if "://" not in url:
+        return False
     try:
         result = urlparse(url)
         return all([result.scheme, result.netloc])
@@ -47,9 +55,7 @@ def debug_tqdm_write(msg: str, file: IO = sys.stderr) -> None:
 
 
 def flatten(L: Iterable[Iterable[Any]]) -> Iterable[Any]:
-    for list in L:
-        for item in list:
-            yield item
+    return itertools.chain.from_iterable(L)
 
 
 def set_flags(debug_level: bool, quiet: bool, force_color: bool) -> None:
@@ -74,6 +80,7 @@ def set_flags(debug_level: bool, quiet: bool, force_color: bool) -> None:
     global DEBUG
     global QUIET
     global FORCE_COLOR
+    global _COLOR_ENABLED
     if debug_level:
         DEBUG = True
         # debug_print("DEBUG is on")
@@ -84,18 +91,25 @@ def set_flags(debug_level: bool, quiet: bool, force_color: bool) -> None:
     if force_color:
         FORCE_COLOR = True
         # debug_print("Output will use ANSI escapes, even if output is not a TTY")
+    _COLOR_ENABLED = None
 
 
 def partition(pred: Callable, iterable: Iterable) -> Tuple[List, List]:
     """E.g. partition(is_odd, range(10)) -> 1 3 5 7 9  and  0 2 4 6 8"""
-    i1, i2 = itertools.tee(iterable)
-    return list(filter(pred, i1)), list(itertools.filterfalse(pred, i2))
+    trues: List = []
+    falses: List = []
+    for x in iterable:
+        (trues if pred(x) else falses).append(x)
+    return trues, falses
 
 
 def partition_set(pred: Callable, iterable: Iterable) -> Tuple[Set, Set]:
     """E.g. partition(is_odd, range(10)) -> 1 3 5 7 9  and  0 2 4 6 8"""
-    i1, i2 = itertools.tee(iterable)
-    return set(filter(pred, i1)), set(itertools.filterfalse(pred, i2))
+    trues: Set = set()
+    falses: Set = set()
+    for x in iterable:
+        (trues if pred(x) else falses).add(x)
+    return trues, falses
 
 
 # cf. https://docs.python.org/3/library/itertools.html#itertools-recipes
@@ -111,7 +125,11 @@ def with_color(color: str, text: str, bold: bool = False) -> str:
     """
     Wrap text in color & reset
     """
-    if not sys.stderr.isatty() and not FORCE_COLOR:
+    global _COLOR_ENABLED
+    if _COLOR_ENABLED is None:
+        # sys.stderr is None when running without a console, e.g. under pythonw
+        _COLOR_ENABLED = FORCE_COLOR or (sys.stderr is not None and sys.stderr.isatty())
+    if not _COLOR_ENABLED:
         return text
 
     reset = Fore.RESET
@@ -134,10 +152,13 @@ def progress_bar(
     #   is a hack, so it will only show the progress bar if there is more than 1 rule to run.
     # not DEBUG - don't show progress bar with debug
     # not QUIET - don't show progress bar with quiet
+    if not file.isatty() or DEBUG or QUIET:
+        return iterable
+
     listified = list(
         iterable
     )  # Consume iterable once so we can check length and then use in tqdm.
-    if file.isatty() and len(listified) > 1 and not DEBUG and not QUIET:
+    if len(listified) > 1:
         # mypy doesn't seem to want to follow tqdm imports. Do this to placate.
         wrapped: Iterable[T] = tqdm(listified, file=file, **kwargs)
         return wrapped
@@ -162,10 +183,11 @@ def sub_check_output(cmd: List[str], **kwargs: Any) -> Any:
     return result
 
 
+@functools.lru_cache(maxsize=None)
 def compute_executable_path(exec_name: str) -> str:
     """Determine full executable path if full path is needed to run it."""
     # First, try packaged binaries
-    pkg_exec = pkg_resources.resource_filename("semgrep.bin", exec_name)
+    pkg_exec = os.path.join(os.path.dirname(__file__), "bin", exec_name)
     if os.path.isfile(pkg_exec):
         return pkg_exec
 
@@ -196,10 +218,7 @@ def liststartswith(l: List[T], head: List[T]) -> bool:
         - liststartswith([1, 2, 3, 4], [1, 2]) -> True
         - liststartswith([1, 2, 3, 4], [1, 4]) -> False
     """
-    if len(head) > len(l):
-        return False
-
-    return all(l[i] == head[i] for i in range(len(head)))
+    return len(head) <= len(l) and l[: len(head)] == head
 
 
 def listendswith(l: List[T], tail: List[T]) -> bool:
@@ -208,17 +227,15 @@ def listendswith(l: List[T], tail: List[T]) -> bool:
         - listendswith([1, 2, 3, 4], [3, 4]) -> True
         - listendswith([1, 2, 3, 4], [1, 4]) -> False
     """
-    if len(tail) > len(l):
-        return False
-
-    return all(l[len(l) - len(tail) + i] == tail[i] for i in range(len(tail)))
+    return len(tail) <= len(l) and l[len(l) - len(tail) :] == tail
 
 
 def is_config_suffix(path: Path) -> bool:
-    return any(
-        listendswith(path.suffixes, suffixes) for suffixes in YML_SUFFIXES
-    ) and not is_config_test_suffix(path)
+    # Leading dots are stripped to agree with Path.suffixes, which treats
+    # e.g. ".yml" as a name without a suffix
+    name = path.name.lstrip(".")
+    return name.endswith(YML_SUFFIXES) and not name.endswith(YML_TEST_SUFFIXES)
 
 
 def is_config_test_suffix(path: Path) -> bool:
-    return any(listendswith(path.suffixes, suffixes) for suffixes in YML_TEST_SUFFIXES)
+    return path.name.lstrip(".").endswith(YML_TEST_SUFFIXES)
@@ -108,14 +108,11 @@ setuptools.setup(
         "tqdm>=4.46.1",
         "packaging>=20.4",
         "jsonschema~=3.2.0",
-        # Include 'setuptools' for 'pkg_resources' usage. We shouldn't be
-        # overly prescriptive and pin the version for two reasons: 1) because
-        # it may interfere with other 'setuptools' installs on the system,
-        # and 2) our 'pkg_resources' API usage appears to have been available
-        # in 'setuptools' for a very long time, so we don't need a recent
-        # version.
-        "setuptools",
     ],
+    extras_require={
+        # Faster JSON and SARIF serialization of large outputs
+        "orjson": ["orjson>=3.4.0"],
+    },
     entry_points={"console_scripts": ["semgrep=semgrep.__main__:main"]},
     packages=setuptools.find_packages(),
     package_data={"semgrep": [os.path.join(BIN_DIR, "*")]},
@@ -0,0 +1,137 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from semgrep.constants import OutputFormat
+from semgrep.output import _build_time_json
+from semgrep.output import EMPTY_OUTPUT_JSON
+from semgrep.output import OutputHandler
+from semgrep.output import OutputSettings
+from semgrep.pattern_match import PatternMatch
+from semgrep.rule import Rule
+from semgrep.rule_match import RuleMatch
+
+
+def make_rule_match(rule_id, line):
+    pattern_match = PatternMatch(
+        {
+            "check_id": rule_id,
+            "path": "foo.py",
+            "start": {"line": 1, "col": 1, "offset": 0},
+            "end": {"line": 1, "col": 5, "offset": 4},
+            "extra": {"lines": [line], "message": "message", "metavars": {}},
+        }
+    )
+    return RuleMatch.from_pattern_match(
+        rule_id, pattern_match, "message", {}, "ERROR", None, None
+    )
+
+
+def make_rule(rule_id):
+    return Rule.from_json(
+        {
+            "id": rule_id,
+            "pattern": "foo(...)",
+            "message": "message",
+            "languages": ["python"],
+            "severity": "ERROR",
+        }
+    )
+
+
+def make_output_handler(output_format, output_destination=None, rule_matches=None):
+    output_settings = OutputSettings(
+        output_format=output_format,
+        output_destination=output_destination,
+        error_on_findings=False,
+        verbose_errors=False,
+        strict=False,
+        json_stats=False,
+        json_time=False,
+        output_per_finding_max_lines_limit=None,
+    )
+    output_handler = OutputHandler(output_settings, stdout=io.StringIO())
+    rule = make_rule("rule")
+    if rule_matches is None:
+        rule_matches = [make_rule_match("rule", f"foo({i})\n") for i in range(3)]
+    output_handler.handle_semgrep_core_output(
+        {rule: rule_matches}, {}, "", set(), None, [rule], {}
+    )
+    return output_handler
+
+
+@pytest.mark.parametrize(
+    "output_format", [OutputFormat.JSON, OutputFormat.SARIF, OutputFormat.TEXT]
+)
+def test_close_saves_what_it_prints(tmp_path, monkeypatch, output_format):
+    destination = tmp_path / "output"
+    output_handler = make_output_handler(output_format, str(destination))
+    outputs = []
+    build_output = output_handler.build_output
+
+    def recording_build_output(*args):
+        outputs.append(build_output(*args))
+        return outputs[-1]
+
+    monkeypatch.setattr(output_handler, "build_output", recording_build_output)
+
+    output_handler.close()
+
+    # the output is built once and reused for the file
+    assert len(outputs) == 1
+    assert output_handler.stdout.getvalue() == destination.read_text() + "\n"
+
+
+def test_empty_json_output():
+    output_handler = make_output_handler(OutputFormat.JSON, rule_matches=[])
+
+    output = output_handler.build_output(False, None)
+
+    assert output is EMPTY_OUTPUT_JSON
+    assert json.loads(output) == {"results": [], "errors": []}
+
+
+def test_close_escapes_non_ascii(tmp_path):
+    destination = tmp_path / "output"
+    output_handler = make_output_handler(
+        OutputFormat.JSON,
+        str(destination),
+        rule_matches=[make_rule_match("rule", "foo('\u00e9\U0001f600')\n")],
+    )
+    stdout = io.BytesIO()
+    output_handler.stdout = io.TextIOWrapper(stdout, encoding="cp1252")
+
+    output_handler.close()
+    output_handler.stdout.flush()
+
+    for output in [stdout.getvalue(), destination.read_bytes()]:
+        results = json.loads(output.decode("ascii"))["results"]
+        assert results[0]["extra"]["lines"] == "foo('\u00e9\U0001f600')"
+
+
+def test_build_time_json():
+    # "a" is listed twice, "other" is not a rule, and "c.py" was not timed
+    rules = [make_rule("a"), make_rule("b"), make_rule("a")]
+    targets = {Path("a.py"), Path("b.py"), Path("c.py")}
+    match_time_matrix = {
+        ("a", "a.py"): 1.0,
+        ("b", "a.py"): 2.0,
+        ("b", "b.py"): 3.0,
+        ("other", "a.py"): 4.0,
+        ("other", "d.py"): 5.0,
+    }
+
+    time = _build_time_json(rules, targets, match_time_matrix)
+
+    assert time["rules"] == [{"id": "a"}, {"id": "b"}, {"id": "a"}]
+    assert time["targets"] == [
+        {
+            "path": str(target),
+            "match_times": [
+                match_time_matrix.get((rule.id, str(target)), 0.0) for rule in rules
+            ],
+        }
+        for target in targets
+    ]
@@ -0,0 +1,57 @@
+import logging
+
+import pytest
+
+from semgrep.error import SemgrepError
+from semgrep.pattern_match import PatternMatch
+from semgrep.rule_match import RuleMatch
+from semgrep.semgrep_main import rule_match_nosem
+
+
+def make_rule_match(line):
+    pattern_match = PatternMatch(
+        {
+            "check_id": "rule-id",
+            "path": "foo.py",
+            "start": {"line": 1, "col": 1, "offset": 0},
+            "end": {"line": 1, "col": 5, "offset": 4},
+            "extra": {"lines": [line], "message": "message", "metavars": {}},
+        }
+    )
+    return RuleMatch.from_pattern_match(
+        "rule-id", pattern_match, "message", {}, "ERROR", None, None
+    )
+
+
+@pytest.mark.parametrize("level", [logging.INFO, logging.DEBUG])
+@pytest.mark.parametrize(
+    "line,expected",
+    [
+        ("foo()", False),
+        ("foo()  # nosem", True),
+        ("foo()  # nosemgrep", True),
+        ("foo()  # NOSEM: rule-id, other-id", True),
+        ("foo()  # nosem: other-id,rule-id", True),
+        ("foo()  # nosemgrep: other-id rule-id", True),
+        ("foo()  # nosem: other-id", False),
+        ("foo()  # nosem: rule-id-2", False),
+        ("foo()  # nosem: 'rule-id'", True),
+        ('<a nosem="rule-id other-id">', True),
+        ("<!-- nosem: rule-id -->", True),
+        ("/* nosem: rule-id */", True),
+        ("/* nosem: other-id */", False),
+    ],
+)
+def test_rule_match_nosem(caplog, level, line, expected):
+    caplog.set_level(level, logger="semgrep")
+
+    assert rule_match_nosem(make_rule_match(line), strict=False) == expected
+
+
+def test_rule_match_nosem_strict():
+    assert rule_match_nosem(make_rule_match("foo()  # nosem: rule-id"), strict=True)
+    assert rule_match_nosem(make_rule_match("foo()  # nosem"), strict=True)
+    with pytest.raises(SemgrepError):
+        rule_match_nosem(
+            make_rule_match("foo()  # nosem: rule-id, other-id"), strict=True
+        )
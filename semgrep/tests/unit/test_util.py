@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+from semgrep import util
+from semgrep.util import is_config_suffix
+from semgrep.util import is_config_test_suffix
+from semgrep.util import is_url
+from semgrep.util import listendswith
+from semgrep.util import liststartswith
+from semgrep.util import partition
+from semgrep.util import partition_set
+from semgrep.util import with_color
+
+
+@pytest.mark.parametrize(
+    "l,head,expected",
+    [
+        ([1, 2, 3, 4], [1, 2], True),
+        ([1, 2, 3, 4], [1, 4], False),
+        ([1, 2, 3, 4], [], True),
+        ([1, 2], [1, 2, 3], False),
+        ([], [], True),
+    ],
+)
+def test_liststartswith(l, head, expected):
+    assert liststartswith(l, head) == expected
+
+
+@pytest.mark.parametrize(
+    "l,tail,expected",
+    [
+        ([1, 2, 3, 4], [3, 4], True),
+        ([1, 2, 3, 4], [1, 4], False),
+        ([1, 2, 3, 4], [], True),
+        ([2, 3], [1, 2, 3], False),
+        ([], [], True),
+    ],
+)
+def test_listendswith(l, tail, expected):
+    assert listendswith(l, tail) == expected
+
+
+@pytest.mark.parametrize(
+    "name,is_config,is_config_test",
+    [
+        ("rules.yml", True, False),
+        ("rules.yaml", True, False),
+        ("rules.test.yml", False, True),
+        ("rules.test.yaml", False, True),
+        ("rules.json", False, False),
+        ("rules.yml.bak", False, False),
+        (".yml", False, False),
+        (".test.yml", True, False),
+    ],
+)
+def test_config_suffix(name, is_config, is_config_test):
+    path = Path("configs") / name
+    assert is_config_suffix(path) == is_config
+    assert is_config_test_suffix(path) == is_config_test
+
+
+def is_odd(x):
+    return x % 2 == 1
+
+
+def test_partition():
+    assert partition(is_odd, iter(range(10))) == ([1, 3, 5, 7, 9], [0, 2, 4, 6, 8])
+
+
+def test_partition_set():
+    assert partition_set(is_odd, [1, 1, 2, 3]) == ({1, 3}, {2})
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("https://semgrep.dev/c/p/python", True),
+        ("file://host/rules.yml", True),
+        ("p/python", False),
+        ("rules.yml", False),
+        ("http:rules.yml", False),
+        ("https://", False),
+        ("://semgrep.dev", False),
+    ],
+)
+def test_is_url(url, expected):
+    assert is_url(url) == expected
+
+
+def test_with_color_without_stderr(monkeypatch):
+    monkeypatch.setattr(util, "_COLOR_ENABLED", None)
+    monkeypatch.setattr(util.sys, "stderr", None)
+
+    assert with_color("\033[31m", "text") == "text"